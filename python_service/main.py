@@ -26,25 +26,38 @@ Architecture:
 # ================================
 import re
 import os
+import asyncio
+import atexit
+import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Set
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, FrozenSet, Iterable, List, Tuple, cast
 
 # ================================
 # Third-Party Framework Imports
 # ================================
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from dotenv import load_dotenv
+from cachetools import TTLCache
+import orjson
+import httpx
+import redis
+import redis.asyncio as aioredis
 
 # ================================
 # LangChain Framework Imports
 # ================================
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import SystemMessage, messages_from_dict, messages_to_dict
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.pydantic_v1 import BaseModel as LangChainBaseModel
+from langchain_core.outputs import Generation
 from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
 # Load environment variables from .env file
@@ -61,16 +74,163 @@ USE_LLM = os.getenv("USE_LLM", "false").lower() == "true"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+# LLM path enabled and configured; decided once at import, not per request
+_LLM_READY = USE_LLM and bool(OPENAI_API_KEY)
+
+# Ask OpenAI for a bare JSON object (response_format=json_object); disable for
+# models that do not support JSON mode
+OPENAI_JSON_MODE = os.getenv("OPENAI_JSON_MODE", "true").lower() == "true"
+
+# Shared connection pool for OpenAI calls (HTTP/2 requires the h2 package)
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "100"))
+
+# Redis configuration (optional; features below are disabled without it)
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Session state limits: in-process cache size and expiry times (local and Redis)
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+PROPOSAL_TTL_SECONDS = int(os.getenv("PROPOSAL_TTL_SECONDS", "900"))
+
+# Coalesce concurrent LLM calls into one chain.abatch() (window of 0 disables)
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+
+# The naive datetime parser only scans this many leading characters
+NAIVE_SCAN_MAX_CHARS = int(os.getenv("NAIVE_SCAN_MAX_CHARS", "512"))
+
+# Logging verbosity (DEBUG includes per-request tracing; WARNING keeps the
+# request path free of log I/O in production)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Identical errors within this window are logged without a traceback
+ERROR_TRACEBACK_INTERVAL_SECONDS = float(os.getenv("ERROR_TRACEBACK_INTERVAL_SECONDS", "60"))
+
+# ================================
+# Logging Setup
+# ================================
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that hands records to the listener unformatted.
+    
+    The stock QueueHandler formats each record on the calling thread; since the
+    listener lives in the same process, message and traceback formatting can be
+    left to the listener thread instead of the request path.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def resolve_log_level(name: str) -> int:
+    """
+    Map a LOG_LEVEL name to a logging level, defaulting to INFO.
+    
+    LOG_LEVEL is shared with the Node backend, whose names ('warn', 'info')
+    mostly match Python's; anything unknown falls back to INFO instead of
+    failing at import.
+    """
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def configure_logging() -> logging.Logger:
+    """
+    Configure the service logger to emit through a background QueueListener.
+    
+    Request handlers only enqueue log records; formatting and stream I/O happen
+    on the listener thread, which is stopped cleanly at interpreter exit.
+    
+    Returns:
+        Configured service logger
+    """
+    service_logger = logging.getLogger("python_service")
+    if service_logger.handlers:
+        return service_logger
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    service_logger.addHandler(DeferredQueueHandler(log_queue))
+    service_logger.setLevel(resolve_log_level(LOG_LEVEL))
+    service_logger.propagate = False
+    return service_logger
+
+logger = configure_logging()
+
+# Recently logged error signatures, expiring after the traceback interval
+_RECENT_ERRORS: TTLCache = TTLCache(maxsize=256, ttl=ERROR_TRACEBACK_INTERVAL_SECONDS)
+
+def should_log_traceback(error: BaseException) -> bool:
+    """
+    Rate-limit traceback logging for repeated errors.
+    
+    Returns True the first time an error signature (type and leading message)
+    is seen within ERROR_TRACEBACK_INTERVAL_SECONDS. During an outage such as
+    a burst of rate-limit errors, the rest are then logged as one-liners
+    without walking and formatting the stack again.
+    
+    Args:
+        error: Exception being logged
+        
+    Returns:
+        True if the traceback should be included in the log record
+    """
+    signature = (type(error).__name__, str(error)[:64])
+    if signature in _RECENT_ERRORS:
+        return False
+    
+    _RECENT_ERRORS[signature] = True
+    return True
+
 # ================================
 # FastAPI Application Setup
 # ================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application startup/shutdown hook.
+    
+    Builds the LangChain pipeline once at startup when the LLM path is enabled,
+    so the first /simulate request does not pay for client construction and
+    schema introspection; stops the LLM batcher and closes the Redis and
+    OpenAI connection pools on shutdown. The globals are reset afterwards so a
+    later startup rebuilds them instead of reusing closed clients.
+    """
+    global _BATCHER, _REDIS, _OPENAI_HTTP_CLIENT, _CHAIN, _PARSER
+    
+    logger.info("🔧 Processing mode - USE_LLM: %s, API Key Available: %s", USE_LLM, bool(OPENAI_API_KEY))
+    if _LLM_READY:
+        get_langchain_chatbot()
+    
+    yield
+    
+    if _BATCHER is not None:
+        await _BATCHER.aclose()
+    if _REDIS is not None:
+        await _REDIS.aclose()
+    if _OPENAI_HTTP_CLIENT is not None:
+        await _OPENAI_HTTP_CLIENT.aclose()
+    
+    # The chain's ChatOpenAI is bound to the closed HTTP client
+    _BATCHER = _REDIS = _OPENAI_HTTP_CLIENT = None
+    _CHAIN = _PARSER = None
+
 app = FastAPI(
     title="Dental AI Chatbot - LangChain Service",
     version="1.0.0",
     description="Intelligent appointment scheduling service powered by LangChain and OpenAI",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson serializes response dicts natively
 )
 
 # ================================
@@ -86,11 +246,14 @@ class ChatRequest(BaseModel):
         user_id: Optional user identifier for session management
         session_id: Optional session identifier for conversation continuity
     """
+    # Requests are read-only once validated; unknown fields are dropped
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     message: str = Field(..., min_length=1, max_length=1000, description="User's chat message")
     user_id: Optional[str] = Field(None, description="User identifier")
     session_id: Optional[str] = Field(None, description="Session identifier for conversation continuity")
 
-class AppointmentResponse(LangChainBaseModel):
+class AppointmentResponse(BaseModel):
     """
     Structured response model for LangChain output parsing
     
@@ -122,89 +285,278 @@ class AppointmentResponse(LangChainBaseModel):
 # Global State Management
 # ================================
 
-# In-memory conversation storage
-# NOTE: In production, replace with Redis or database for persistence and scalability
-CONVERSATION_HISTORY: Dict[str, ChatMessageHistory] = {}
+# Hot tier of conversation storage: in-process cache of recent sessions,
+# bounded by size (least recently used evicted first) and idle time.
+# When REDIS_URL is set, Redis holds the authoritative copy: every request
+# reloads the session from it and writes the new turns back, so any worker can
+# serve any session. Concurrent requests for the same session still race and
+# the last write wins.
+CONVERSATION_HISTORY: TTLCache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL_SECONDS)
+
+# Pending appointment proposal: (ISO8601 time, formatted display time)
+Proposal = Tuple[str, str]
 
 # Track last appointment proposal per session for confirmation workflow
-LAST_PROPOSAL: Dict[str, str] = {}
+# (in-process fallback; stored in Redis when configured). Both expire after
+# PROPOSAL_TTL_SECONDS so a stale offer cannot be confirmed later.
+LAST_PROPOSAL: TTLCache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=PROPOSAL_TTL_SECONDS)
+
+# Lazily-created asyncio Redis client shared by the session and proposal stores
+_REDIS: Optional[aioredis.Redis] = None
+
+# Pooled async HTTP client shared by all OpenAI requests in this process
+_OPENAI_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+# Lazily-initialized LangChain pipeline, built once per process and reused
+_CHAIN: Optional[Runnable] = None
+_PARSER: Optional[JsonOutputParser] = None
+
+# Lazily-started micro-batcher for concurrent LLM calls (see LLM_BATCH_WINDOW_MS)
+_BATCHER: Optional["LLMBatcher"] = None
+
+# ================================
+# Prompt Templates
+# ================================
+
+# Static system prompt. Kept free of template variables so it is used verbatim:
+# only the format instructions are appended, once, when the chain is built.
+SYSTEM_PROMPT = """You are DentBot, a professional AI assistant for a modern dental clinic specializing in appointment scheduling and patient care.
+
+PERSONALITY & TONE:
+- Friendly, professional, and empathetic
+- Clear and concise communication
+- Patient-focused and helpful
+
+CORE RESPONSIBILITIES:
+- Schedule dental appointments efficiently
+- Extract specific dates/times from natural language
+- Provide appointment availability and suggestions
+- Answer basic dental care questions
+- Maintain conversation context and continuity
+
+APPOINTMENT SCHEDULING RULES:
+- Convert relative dates (e.g., "next Monday", "tomorrow") to ISO8601 format
+- Business hours: Monday-Friday 8 AM - 6 PM, Saturday 9 AM - 3 PM
+- If time is ambiguous, suggest options and ask for confirmation
+- Always propose specific times rather than vague responses
+- Set needs_confirmation=true for appointment proposals
+
+RESPONSE FORMAT:
+- Always respond using the exact JSON structure specified
+- Keep replies under 100 words for better user experience
+- Use appropriate intent classification: chat, propose, confirm, decline
+
+"""
+
+# The only per-request prompt interpolation, placed after the history
+CURRENT_DATETIME_PROMPT = "Current date/time for reference: {current_datetime}"
 
 # ================================
 # Natural Language Processing Constants
 # ================================
 
 # Affirmative response patterns for appointment confirmation
-AFFIRMATIVE_PATTERNS: Set[str] = {
+AFFIRMATIVE_PATTERNS: FrozenSet[str] = frozenset({
     'yes', 'yeah', 'yep', 'confirm', 'sure', 'ok', 'okay', 
     'please book', 'book it', 'sounds good', 'that works',
     'perfect', 'great', 'good'
-}
+})
 
 # Negative response patterns for appointment rejection
-NEGATIVE_PATTERNS: Set[str] = {
+NEGATIVE_PATTERNS: FrozenSet[str] = frozenset({
     'no', 'nope', 'cancel', "don't", 'do not', 'not now', 
     'later', 'different time', 'another time', 'not available'
-}
+})
 
 # Single character shortcuts for quick responses
-SHORT_AFFIRMATIVE: Set[str] = {'y'}
-SHORT_NEGATIVE: Set[str] = {'n'}
+SHORT_AFFIRMATIVE: FrozenSet[str] = frozenset({'y'})
+SHORT_NEGATIVE: FrozenSet[str] = frozenset({'n'})
+
+# Lowercased once at import so lookups never re-normalize the vocabulary
+SHORT_AFFIRMATIVE_LC: FrozenSet[str] = frozenset(reply.lower() for reply in SHORT_AFFIRMATIVE)
+SHORT_NEGATIVE_LC: FrozenSet[str] = frozenset(reply.lower() for reply in SHORT_NEGATIVE)
+
+# Keywords selecting the general-assistance fallback reply
+SCHEDULING_KEYWORDS: FrozenSet[str] = frozenset({
+    'appointment', 'appointments', 'schedule', 'scheduling',
+    'book', 'booking', 'available', 'availability'
+})
+OFFICE_HOURS_KEYWORDS: FrozenSet[str] = frozenset({'hours', 'open', 'opening', 'closed'})
+
+# General-assistance replies keyed by fallback topic (None: no topic detected)
+FALLBACK_REPLIES: Dict[Optional[str], str] = {
+    'scheduling': "I'd be happy to help you schedule an appointment! Please let me know what day and time works best for you. For example, you could say 'next Monday at 2pm' or 'Friday morning'.",
+    'office_hours': "Our office hours are Monday through Friday 8 AM to 6 PM, and Saturday 9 AM to 3 PM. We're closed on Sundays. When would you like to schedule your appointment?",
+    None: "Hello! I'm here to help you schedule dental appointments. What day and time would work best for you?"
+}
+
+# Map weekday spellings to numbers (Monday=0, Sunday=6)
+WEEKDAY_MAPPING: Dict[str, int] = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'mon': 0, 'tue': 1, 'tues': 1, 'wed': 2, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'fri': 4, 'sat': 5, 'sun': 6
+}
+
+# Relative day terms and their offset from today
+RELATIVE_DAY_OFFSETS: Dict[str, int] = {
+    'tomorrow': 1,
+    'today': 0,
+    'next week': 7
+}
 
 # ================================
-# Natural Language Processing Utilities
+# Precompiled Regular Expressions
 # ================================
 
-def has_token(text: str, vocabulary: Set[str]) -> bool:
+def trie_pattern(words: Iterable[str]) -> str:
     """
-    Check if any phrase from the vocabulary appears as complete words/phrases in the text.
+    Build a regex alternation for the words, factored by shared prefixes.
     
-    Uses word boundaries to ensure accurate matching and handles multi-word phrases.
-    For example, 'please book' will match in 'please book me' but not in 'pleasebook'.
+    The words are inserted into a character trie that is emitted as nested
+    groups, e.g. {'mon', 'monday'} becomes 'mon(?:day)?'. The regex engine
+    then tests each leading character once instead of retrying every word at
+    each position, giving a single trie walk per candidate match.
     
     Args:
-        text: Input text to search in (case-insensitive)
-        vocabulary: Set of phrases/words to search for
+        words: Literal words to match
         
     Returns:
-        True if any vocabulary item is found as a complete token/phrase
+        Regex source (without anchors or word boundaries)
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end-of-word marker
+    
+    def emit(node: Dict[str, dict]) -> str:
+        is_word_end = '' in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_word_end:
+            return branches[0]
+        alternation = '(?:' + '|'.join(branches) + ')'
+        # Optional suffix is greedy, so the longest spelling is tried first
+        return alternation + '?' if is_word_end else alternation
+    
+    return emit(trie)
+
+def _vocabulary_alternation(vocabulary: Iterable[str]) -> str:
+    """Escape and join phrases longest first so multi-word entries win over their prefixes."""
+    phrases = sorted({phrase.lower() for phrase in vocabulary}, key=lambda phrase: (-len(phrase), phrase))
+    return "|".join(re.escape(phrase) for phrase in phrases)
+
+# Confirmation reply classifier, compiled once at import so the request path
+# only runs .search(); the group that matched names the intent
+_CONFIRMATION_RE = re.compile(
+    r"\b(?:(?P<confirm>" + _vocabulary_alternation(AFFIRMATIVE_PATTERNS) + r")"
+    r"|(?P<decline>" + _vocabulary_alternation(NEGATIVE_PATTERNS) + r"))\b"
+)
+
+# Fallback reply topic selector: both keyword sets fused into one scan, the
+# group that matched names the topic (the vocabularies do not overlap)
+_FALLBACK_TOPIC_RE = re.compile(
+    r"\b(?:(?P<scheduling>" + _vocabulary_alternation(SCHEDULING_KEYWORDS) + r")"
+    r"|(?P<office_hours>" + _vocabulary_alternation(OFFICE_HOURS_KEYWORDS) + r"))\b"
+)
+
+# Exact one-word replies ('y', 'yes', 'nope', ...) mapped to their intent so
+# the common case is a dict lookup and never reaches the regex
+_SHORT_REPLY_INTENTS: Dict[str, str] = {
+    **{reply: 'confirm' for reply in SHORT_AFFIRMATIVE_LC.union(map(str.lower, AFFIRMATIVE_PATTERNS)) if ' ' not in reply},
+    **{reply: 'decline' for reply in SHORT_NEGATIVE_LC.union(map(str.lower, NEGATIVE_PATTERNS)) if ' ' not in reply},
+}
+
+# Trailing punctuation ignored for the one-word reply lookup
+_SHORT_REPLY_PUNCTUATION = ".!"
+
+# Single-pass scanner for the naive datetime parser. Each alternative is
+# wrapped in a named group so match.lastgroup tells which one matched:
+# a weekday name, a relative day term, or a clock time such as "2pm",
+# "10:30 am" or "3".
+_DATETIME_SCAN_RE = re.compile(
+    r'\b(?P<weekday>' + trie_pattern(WEEKDAY_MAPPING) + r')\b'
+    r'|\b(?P<relative>' + trie_pattern(RELATIVE_DAY_OFFSETS) + r')\b'
+    r'|(?P<time>(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm|a\.?m\.?|p\.?m\.?)?)'
+)
+
+# ================================
+# Natural Language Processing Utilities
+# ================================
+
+def classify_confirmation(text_lower: str) -> Optional[str]:
     """
-    text_lower = text.lower()
+    Classify a reply to a pending appointment proposal in a single pass.
+    
+    Exact one-word replies ('y', 'yes!', 'nope.') are resolved with one dict lookup; otherwise
+    one regex search finds the first affirmative or negative phrase and the
+    matching group names the intent.
     
-    for phrase in vocabulary:
-        # Use word boundaries for accurate matching
-        pattern = rf"\b{re.escape(phrase.lower())}\b"
-        if re.search(pattern, text_lower):
-            return True
+    Args:
+        text_lower: User's reply, already lowercased and stripped
+        
+    Returns:
+        'confirm', 'decline', or None if the reply is neither
+    """
+    # rstrip() returns the same string when there is nothing to strip, so
+    # "yes!" / "ok." hit the fast path at no cost for plain replies
+    short_intent = _SHORT_REPLY_INTENTS.get(text_lower.rstrip(_SHORT_REPLY_PUNCTUATION))
+    if short_intent:
+        return short_intent
     
-    return False
+    match = _CONFIRMATION_RE.search(text_lower)
+    return match.lastgroup if match else None
 
-def equals_any_trimmed(text: str, values: Set[str]) -> bool:
+def classify_fallback_topic(text_lower: str) -> Optional[str]:
     """
-    Check if the trimmed text exactly matches any value in the set.
+    Pick the topic of the general-assistance fallback reply in a single scan.
     
-    Useful for single-character responses like 'y' or 'n'.
+    Scheduling keywords take precedence over office-hours keywords wherever
+    they appear, so the scan stops at the first scheduling match.
     
     Args:
-        text: Input text to check
-        values: Set of exact values to match against
+        text_lower: Already-lowercased user message
         
     Returns:
-        True if trimmed text matches any value (case-insensitive)
+        'scheduling', 'office_hours', or None if neither topic is mentioned
     """
-    normalized_text = text.strip().lower()
-    normalized_values = {val.lower() for val in values}
-    return normalized_text in normalized_values
+    topic = None
+    for match in _FALLBACK_TOPIC_RE.finditer(text_lower):
+        topic = match.lastgroup
+        if topic == 'scheduling':
+            break
+    
+    return topic
 
 # ================================
 # Session Management Functions
 # ================================
 
+def get_redis_client() -> Optional[aioredis.Redis]:
+    """
+    Return the shared asyncio Redis client, or None when REDIS_URL is not configured.
+    
+    Connections are opened lazily from the client's pool on first command, so
+    store calls are awaited on the event loop without blocking it.
+    """
+    global _REDIS
+    
+    if _REDIS is None and REDIS_URL:
+        _REDIS = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+    
+    return _REDIS
+
 def get_session_history(session_id: str) -> ChatMessageHistory:
     """
     Get or create conversation history for a specific session.
     
     Maintains conversation context across multiple requests within the same session.
-    In production, this should be backed by a persistent store like Redis or database.
+    This is the synchronous factory used by RunnableWithMessageHistory, so it only
+    consults the in-process cache; call load_session_history() first to rehydrate
+    a session from Redis.
     
     Args:
         session_id: Unique session identifier
@@ -215,17 +567,210 @@ def get_session_history(session_id: str) -> ChatMessageHistory:
     if not session_id:
         session_id = "default"
     
-    if session_id not in CONVERSATION_HISTORY:
-        CONVERSATION_HISTORY[session_id] = ChatMessageHistory()
-        print(f"Created new conversation history for session: {session_id}")
+    history = CONVERSATION_HISTORY.get(session_id)
+    if history is None:
+        history = ChatMessageHistory()
+        CONVERSATION_HISTORY[session_id] = history
+        logger.debug("Created new conversation history for session: %s", session_id)
     
-    return CONVERSATION_HISTORY[session_id]
+    return history
 
+async def load_session_history(session_id: str) -> ChatMessageHistory:
+    """
+    Get a session's history, loading the shared copy from Redis when configured.
+    
+    With Redis, the stored history is always reloaded so turns written by
+    other workers are never answered from, or overwritten with, a stale local
+    copy. The in-process cache is used when Redis is not configured, has no
+    copy, or is unavailable; each use restarts the entry's idle expiry
+    (matching the sliding TTL in Redis).
+    
+    Args:
+        session_id: Unique session identifier
+        
+    Returns:
+        ChatMessageHistory object for the session
+    """
+    session_id = session_id or "default"
+    
+    history = None
+    client = get_redis_client()
+    if client is not None:
+        try:
+            # The client decodes responses, so the stored value is a str
+            stored = await cast(Awaitable[Optional[str]], client.hget(f"session:{session_id}", "history"))
+            if stored:
+                history = ChatMessageHistory()
+                history.add_messages(messages_from_dict(orjson.loads(stored)))
+                logger.debug("Loaded conversation history from Redis for session: %s", session_id)
+        except redis.RedisError as error:
+            logger.warning("⚠️ Failed to load session %s from Redis: %s", session_id, error)
+    
+    if history is None:
+        history = CONVERSATION_HISTORY.get(session_id)
+    if history is None:
+        history = ChatMessageHistory()
+    
+    # (Re-)inserting resets the entry's TTL
+    CONVERSATION_HISTORY[session_id] = history
+    return history
+
+async def save_session_history(session_id: str) -> None:
+    """
+    Write a session's history through to Redis with a sliding TTL.
+    
+    No-op when Redis is not configured or the session is not cached locally.
+    
+    Args:
+        session_id: Unique session identifier
+    """
+    client = get_redis_client()
+    history = CONVERSATION_HISTORY.get(session_id or "default")
+    if client is None or history is None:
+        return
+    
+    key = f"session:{session_id or 'default'}"
+    try:
+        async with client.pipeline() as pipeline:
+            pipeline.hset(key, "history", orjson.dumps(messages_to_dict(history.messages)).decode())
+            pipeline.expire(key, SESSION_TTL_SECONDS)
+            await pipeline.execute()
+    except redis.RedisError as error:
+        logger.warning("⚠️ Failed to persist session %s to Redis: %s", session_id, error)
+
+# ================================
+# Appointment Proposal Store
+# ================================
+
+def format_appointment_time(appointment_time: str) -> str:
+    """
+    Render an ISO8601 appointment time for display, e.g. 'October 19 at 02:00 PM'.
+    
+    Args:
+        appointment_time: ISO8601 datetime string
+        
+    Returns:
+        Human-readable appointment time
+    """
+    return datetime.fromisoformat(appointment_time).strftime("%B %d at %I:%M %p")
+
+def _decode_proposal(stored: Optional[str]) -> Optional[Proposal]:
+    """
+    Decode a proposal stored in Redis as a JSON [iso, formatted] pair.
+    
+    Malformed values (including proposals written in an older format) are
+    logged and treated as no pending proposal rather than failing the request.
+    """
+    if not stored:
+        return None
+    
+    try:
+        appointment_time, formatted_time = orjson.loads(stored)
+        datetime.fromisoformat(appointment_time)
+    except (ValueError, TypeError) as error:  # orjson.JSONDecodeError is a ValueError
+        logger.warning("⚠️ Discarding unreadable proposal %.64r: %s", stored, error)
+        return None
+    
+    return appointment_time, formatted_time
+
+async def set_proposal(session_id: str, appointment_time: str, formatted_time: str) -> None:
+    """
+    Store the pending appointment proposal for a session.
+    
+    The display string is stored alongside the ISO time so confirming never
+    has to parse and reformat it again. In Redis the proposal expires after
+    PROPOSAL_TTL_SECONDS so stale offers are not confirmed later, and any
+    worker can complete the confirmation.
+    
+    Args:
+        session_id: Unique session identifier
+        appointment_time: ISO8601 datetime string being proposed
+        formatted_time: Human-readable form from format_appointment_time()
+    """
+    client = get_redis_client()
+    if client is not None:
+        try:
+            await client.set(
+                f"proposal:{session_id}",
+                orjson.dumps([appointment_time, formatted_time]),
+                ex=PROPOSAL_TTL_SECONDS
+            )
+            return
+        except redis.RedisError as error:
+            logger.warning("⚠️ Failed to store proposal in Redis, using local store: %s", error)
+    
+    LAST_PROPOSAL[session_id] = (appointment_time, formatted_time)
+
+async def pop_proposal(session_id: str) -> Optional[Proposal]:
+    """
+    Remove and return the pending appointment proposal for a session.
+    
+    Args:
+        session_id: Unique session identifier
+        
+    Returns:
+        (ISO8601 datetime string, formatted time) of the removed proposal, or None
+    """
+    client = get_redis_client()
+    if client is not None:
+        try:
+            return _decode_proposal(await client.getdel(f"proposal:{session_id}"))
+        except redis.RedisError as error:
+            logger.warning("⚠️ Failed to remove proposal from Redis, using local store: %s", error)
+    
+    return LAST_PROPOSAL.pop(session_id, None)
 
 # ================================
 # LangChain Integration Functions
 # ================================
 
+def _current_datetime() -> str:
+    """Render the current local time for the system prompt."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class FastJsonOutputParser(JsonOutputParser):
+    """
+    JsonOutputParser that decodes complete responses with orjson.
+    
+    In JSON mode the completion is a bare JSON object, so the markdown-fence
+    and partial-JSON handling of the base parser is only needed while
+    streaming, or if the model wraps its output anyway.
+    """
+    
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        if not partial:
+            try:
+                return orjson.loads(result[0].text)
+            except orjson.JSONDecodeError:
+                pass
+        
+        return super().parse_result(result, partial=partial)
+
+def create_openai_http_client() -> httpx.AsyncClient:
+    """
+    Build the pooled async HTTP client used for OpenAI calls.
+    
+    Keeping connections alive across requests amortizes the TCP/TLS handshake;
+    with HTTP/2 (OPENAI_HTTP2, needs the h2 package) concurrent calls are also
+    multiplexed over one connection. Without h2 the client falls back to
+    pooled HTTP/1.1 keep-alive connections.
+    
+    Returns:
+        httpx.AsyncClient with the configured connection limits
+    """
+    limits = httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+    )
+    
+    if OPENAI_HTTP2:
+        try:
+            return httpx.AsyncClient(http2=True, timeout=30, limits=limits)
+        except ImportError:
+            logger.warning("⚠️ h2 package not installed, using HTTP/1.1 for OpenAI calls")
+    
+    return httpx.AsyncClient(timeout=30, limits=limits)
+
 def create_langchain_chatbot():
     """
     Initialize LangChain chatbot with OpenAI LLM, structured output parsing, and conversation memory.
@@ -239,93 +784,229 @@ def create_langchain_chatbot():
     Returns:
         tuple: (chain_with_history, parser) or (None, None) if initialization fails
     """
+    global _OPENAI_HTTP_CLIENT
+    
     try:
-        # Validate OpenAI API key
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            print("Warning: OpenAI API key not found. LLM features will be disabled.")
+        # Validate OpenAI API key (read once at import)
+        if not OPENAI_API_KEY:
+            logger.warning("OpenAI API key not found. LLM features will be disabled.")
             return None, None
+        
+        # One connection pool per process, reused if the chain is rebuilt
+        if _OPENAI_HTTP_CLIENT is None:
+            _OPENAI_HTTP_CLIENT = create_openai_http_client()
 
         # Initialize the Language Model with optimal settings for conversation
         llm = ChatOpenAI(
             model=OPENAI_MODEL,
             temperature=0.2,  # Low temperature for consistent, focused responses
-            openai_api_key=api_key,
+            openai_api_key=OPENAI_API_KEY,
             max_tokens=500,   # Limit response length for efficiency
-            request_timeout=30  # 30 second timeout for API calls
+            request_timeout=30,  # 30 second timeout for API calls
+            http_async_client=_OPENAI_HTTP_CLIENT,  # Shared keep-alive pool for ainvoke/abatch/astream
+            model_kwargs={"response_format": {"type": "json_object"}} if OPENAI_JSON_MODE else {},
         )
 
-        # Create structured output parser using our Pydantic model
-        parser = JsonOutputParser(pydantic_object=AppointmentResponse)
+        # Create structured output parser using our Pydantic model (the schema
+        # feeds the format instructions; responses are decoded with orjson)
+        parser = FastJsonOutputParser(pydantic_object=AppointmentResponse)
 
-        # Define the system prompt with clear instructions and context
-        system_prompt = """You are DentBot, a professional AI assistant for a modern dental clinic specializing in appointment scheduling and patient care.
-
-PERSONALITY & TONE:
-- Friendly, professional, and empathetic
-- Clear and concise communication
-- Patient-focused and helpful
-
-CORE RESPONSIBILITIES:
-- Schedule dental appointments efficiently
-- Extract specific dates/times from natural language
-- Provide appointment availability and suggestions
-- Answer basic dental care questions
-- Maintain conversation context and continuity
-
-APPOINTMENT SCHEDULING RULES:
-- Convert relative dates (e.g., "next Monday", "tomorrow") to ISO8601 format
-- Business hours: Monday-Friday 8 AM - 6 PM, Saturday 9 AM - 3 PM
-- If time is ambiguous, suggest options and ask for confirmation
-- Always propose specific times rather than vague responses
-- Set needs_confirmation=true for appointment proposals
-
-RESPONSE FORMAT:
-- Always respond using the exact JSON structure specified
-- Keep replies under 100 words for better user experience
-- Use appropriate intent classification: chat, propose, confirm, decline
-
-Current date/time for reference: {current_datetime}
-
-{format_instructions}"""
-
-        # Create the conversation prompt template
+        # Create the conversation prompt template. Everything before the history
+        # is byte-identical across requests (the format instructions are constant
+        # for the schema) so providers can reuse their prompt prefix cache; the
+        # volatile current datetime goes after the history, next to the input.
         prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=system_prompt),
+            SystemMessage(content=SYSTEM_PROMPT + parser.get_format_instructions()),
             MessagesPlaceholder(variable_name="history"),
-            HumanMessage(content="{input}")
-        ])
+            ("system", CURRENT_DATETIME_PROMPT),
+            ("human", "{input}")
+        ]).partial(current_datetime=_current_datetime)
 
-        # Build the processing chain: Prompt → LLM → Parser
-        chain = prompt | llm | parser
-
-        # Add conversation memory for session continuity
+        # Add conversation memory for session continuity. History wraps
+        # Prompt → LLM so the raw AI message is what gets stored; the parser
+        # runs on the output afterwards.
         chain_with_history = RunnableWithMessageHistory(
-            chain,
+            prompt | llm,
             get_session_history,
             input_messages_key="input",
             history_messages_key="history",
-        )
+        ) | parser
 
-        print(f"✅ LangChain chatbot initialized successfully with model: {OPENAI_MODEL}")
+        logger.info("✅ LangChain chatbot initialized successfully with model: %s", OPENAI_MODEL)
         return chain_with_history, parser
 
     except Exception as error:
-        print(f"❌ Failed to create LangChain chatbot: {error}")
-        import traceback
-        traceback.print_exc()
+        logger.error("❌ Failed to create LangChain chatbot: %s", error, exc_info=should_log_traceback(error))
         return None, None
 
-def langchain_extract_and_reply(user_text: str, session_id: str) -> Dict[str, Any]:
+def get_langchain_chatbot() -> Tuple[Optional[Runnable], Optional[JsonOutputParser]]:
+    """
+    Return the process-wide LangChain chatbot, creating it on first use.
+    
+    Construction (LLM client, parser, prompt template, history wrapper) happens
+    once per process. Failed initialization is not cached so a later request
+    can retry once configuration is fixed.
+    
+    Returns:
+        tuple: (chain_with_history, parser) or (None, None) if unavailable
+    """
+    global _CHAIN, _PARSER
+    
+    if _CHAIN is None or _PARSER is None:
+        _CHAIN, _PARSER = create_langchain_chatbot()
+    
+    return _CHAIN, _PARSER
+
+# ================================
+# LLM Request Batching
+# ================================
+
+class LLMBatcher:
+    """
+    In-process micro-batcher that coalesces concurrent chain invocations.
+    
+    Requests are queued and a background task collects them for up to
+    `window_seconds` or `max_size` items, then dispatches the whole group with
+    a single `chain.abatch()` call and resolves each caller's future.
+    """
+    
+    def __init__(self, chain: Any, window_seconds: float, max_size: int):
+        self.chain = chain
+        self.window_seconds = window_seconds
+        self.max_size = max(1, max_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def submit(self, inputs: Dict[str, Any], config: RunnableConfig) -> Any:
+        """Queue one invocation and wait for its result from the next batch."""
+        self._ensure_worker()
+        assert self._loop is not None and self._queue is not None
+        future = self._loop.create_future()
+        await self._queue.put((inputs, config, future))
+        return await future
+    
+    async def aclose(self) -> None:
+        """Stop the background batching task."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+    
+    def _ensure_worker(self) -> None:
+        """Start the batching task on the running loop if it is not already active."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue, loop))
+    
+    async def _run(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop) -> None:
+        """Collect queued invocations into batches and dispatch them."""
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window_seconds
+            
+            while len(batch) < self.max_size:
+                # Take requests that are already waiting without suspending;
+                # only block (with a timeout) once the queue is empty
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._dispatch(batch)
+    
+    async def _dispatch(self, batch: List[Tuple[Dict[str, Any], RunnableConfig, asyncio.Future]]) -> None:
+        """Run one abatch() call and fan results (or errors) back out to callers."""
+        try:
+            results = await self.chain.abatch(
+                [inputs for inputs, _, _ in batch],
+                config=[config for _, config, _ in batch],
+                return_exceptions=True
+            )
+        except Exception as error:
+            results = [error] * len(batch)
+        
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+def get_llm_batcher(chain: Any) -> LLMBatcher:
+    """
+    Return the process-wide LLM batcher for the given chain, creating it on first use.
+    
+    Args:
+        chain: Runnable whose abatch() will receive the coalesced requests
+        
+    Returns:
+        LLMBatcher configured from LLM_BATCH_WINDOW_MS and LLM_BATCH_MAX_SIZE
+    """
+    global _BATCHER
+    
+    if _BATCHER is None or _BATCHER.chain is not chain:
+        _BATCHER = LLMBatcher(chain, LLM_BATCH_WINDOW_MS / 1000, LLM_BATCH_MAX_SIZE)
+    
+    return _BATCHER
+
+def standardize_llm_response(response: Any) -> Optional[Dict[str, Any]]:
+    """
+    Normalize a parsed LLM response into the standard reply fields.
+    
+    Args:
+        response: Output of the chain's JSON parser
+        
+    Returns:
+        Dict with reply, appointment_candidate, intent, needs_confirmation and
+        confidence, or None if the response is not a JSON object or its
+        appointment_candidate is not an ISO8601 datetime
+    """
+    if not isinstance(response, dict):
+        logger.warning("⚠️ Unexpected response type: %s", type(response))
+        return None
+    
+    appointment_candidate = response.get("appointment_candidate")
+    if appointment_candidate:
+        # The candidate is stored and formatted later, so it must be ISO8601
+        try:
+            datetime.fromisoformat(appointment_candidate)
+        except (ValueError, TypeError):
+            logger.warning("⚠️ Unparseable appointment candidate: %.64r", appointment_candidate)
+            return None
+    
+    return {
+        "reply": response.get("reply", "I'm here to help with your appointment needs."),
+        "appointment_candidate": appointment_candidate,
+        "intent": response.get("intent", "chat"),
+        "needs_confirmation": response.get("needs_confirmation", False),
+        "confidence": max(0.0, min(1.0, response.get("confidence", 0.8)))  # Clamp to 0-1 range
+    }
+
+async def langchain_extract_and_reply(user_text: str, session_id: str) -> Dict[str, Any]:
     """
     Process user input through LangChain for intelligent appointment extraction and response generation.
     
     This function orchestrates the complete AI processing pipeline:
-    1. Initialize or retrieve the LangChain chatbot
-    2. Prepare context with current datetime
-    3. Process user input through the LLM with conversation history
-    4. Extract structured appointment information
-    5. Return standardized response format
+    1. Retrieve the cached LangChain chatbot
+    2. Process user input through the LLM with conversation history
+    3. Extract structured appointment information
+    4. Return standardized response format
     
     Args:
         user_text: User's natural language input
@@ -335,50 +1016,43 @@ def langchain_extract_and_reply(user_text: str, session_id: str) -> Dict[str, An
         Dict containing reply, appointment_candidate, intent, needs_confirmation, and confidence
     """
     try:
-        # Initialize LangChain chatbot (cached after first creation)
-        chain, parser = create_langchain_chatbot()
+        # Retrieve LangChain chatbot (cached after first creation)
+        chain, parser = get_langchain_chatbot()
         if not chain or not parser:
-            print("⚠️ LangChain chatbot not available, falling back to naive parsing")
+            logger.warning("⚠️ LangChain chatbot not available, falling back to naive parsing")
             return {"reply": None, "appointment_candidate": None}
 
-        # Prepare context information for the LLM
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        logger.debug("🧠 Processing with LangChain: '%.50s...' (Session: %.8s)", user_text, session_id)
         
-        print(f"🧠 Processing with LangChain: '{user_text[:50]}...' (Session: {session_id[:8]})")
+        chain_input = {"input": user_text.strip()}
+        chain_config: RunnableConfig = {"configurable": {"session_id": session_id or "default"}}
         
-        # Invoke the LangChain pipeline with conversation history
-        response = chain.invoke(
-            {
-                "input": user_text.strip(),
-                "current_datetime": current_time,
-                "format_instructions": parser.get_format_instructions()
-            },
-            config={"configurable": {"session_id": session_id or "default"}}
-        )
+        # Warm the session into the in-process cache; the history wrapper then
+        # reads it synchronously without touching Redis
+        await load_session_history(session_id)
+        
+        # Invoke the LangChain pipeline with conversation history; awaiting the
+        # async client keeps the event loop free while OpenAI responds
+        if LLM_BATCH_WINDOW_MS > 0:
+            response = await get_llm_batcher(chain).submit(chain_input, chain_config)
+        else:
+            response = await chain.ainvoke(chain_input, config=chain_config)
 
-        # Validate response structure
-        if not isinstance(response, dict):
-            print(f"⚠️ Unexpected response type: {type(response)}")
+        # Write the updated history through to the shared store
+        await save_session_history(session_id)
+
+        # Validate response structure and return the standardized format
+        standardized = standardize_llm_response(response)
+        if standardized is None:
             return {"reply": None, "appointment_candidate": None}
 
-        print(f"✅ LangChain response: {response}")
-        
-        # Return standardized response format
-        return {
-            "reply": response.get("reply", "I'm here to help with your appointment needs."),
-            "appointment_candidate": response.get("appointment_candidate"),
-            "intent": response.get("intent", "chat"),
-            "needs_confirmation": response.get("needs_confirmation", False),
-            "confidence": max(0.0, min(1.0, response.get("confidence", 0.8)))  # Clamp to 0-1 range
-        }
+        logger.debug("✅ LangChain response: %s", response)
+        return standardized
 
     except Exception as error:
-        print(f"❌ LangChain processing error: {repr(error)}")
-        
-        # Log detailed error information for debugging
-        import traceback
-        print("Full error traceback:")
-        traceback.print_exc()
+        # Include the traceback only for the first occurrence of this error
+        # within the rate-limit window
+        logger.error("❌ LangChain processing error: %r", error, exc_info=should_log_traceback(error))
         
         # Return fallback response structure
         return {
@@ -389,11 +1063,64 @@ def langchain_extract_and_reply(user_text: str, session_id: str) -> Dict[str, An
             "confidence": 0.0
         }
 
+async def langchain_stream_reply(user_text: str, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the LangChain response as progressively more complete JSON objects.
+    
+    The JSON parser emits the partially generated object as tokens arrive, so
+    the client can render the reply before generation finishes. Streaming
+    bypasses the micro-batcher. Errors propagate to the caller.
+    
+    Args:
+        user_text: User's natural language input
+        session_id: Session identifier for conversation continuity
+        
+    Yields:
+        Partial response dicts; the last one is the complete response
+    """
+    chain, parser = get_langchain_chatbot()
+    if not chain or not parser:
+        logger.warning("⚠️ LangChain chatbot not available, falling back to naive parsing")
+        return
+    
+    logger.debug("🧠 Streaming with LangChain: '%.50s...' (Session: %.8s)", user_text, session_id)
+    
+    await load_session_history(session_id)
+    
+    async for partial in chain.astream(
+        {"input": user_text.strip()},
+        config={"configurable": {"session_id": session_id or "default"}}
+    ):
+        yield partial
+    
+    await save_session_history(session_id)
+
 # ================================
 # Fallback Datetime Parsing Functions
 # ================================
 
-def naive_extract_datetime(text: str) -> Optional[str]:
+def _clock_time(match: re.Match) -> Tuple[int, int]:
+    """
+    Convert a scanned clock-time match to 24-hour (hour, minute).
+    
+    Times without AM/PM before 8 are assumed to be in the afternoon.
+    """
+    hour = int(match.group('hour'))
+    minute = int(match.group('minute') or 0)
+    am_pm = (match.group('meridiem') or '').replace('.', '')
+    
+    if am_pm == 'pm':
+        if hour != 12:
+            hour += 12
+    elif am_pm == 'am':
+        if hour == 12:
+            hour = 0
+    elif hour < 8:  # Assume afternoon if no AM/PM and hour < 8
+        hour += 12
+    
+    return hour, minute
+
+def naive_extract_datetime(text_lower: str) -> Optional[str]:
     """
     Fallback datetime extraction using regex patterns and basic NLP.
     
@@ -403,62 +1130,53 @@ def naive_extract_datetime(text: str) -> Optional[str]:
     - "next Tuesday 10:30am"
     - "Friday at 3"
     
+    The text is scanned once with a combined pattern that picks up the first
+    weekday, relative day term and clock time together. Only the first
+    NAIVE_SCAN_MAX_CHARS characters are scanned (bounded via endpos, without
+    copying the string).
+    
     Args:
-        text: Natural language text containing potential appointment time
+        text_lower: Already-lowercased, stripped text containing potential appointment time
         
     Returns:
         ISO8601 datetime string if time is extracted, None otherwise
     """
     try:
-        text_lower = text.lower().strip()
-        
-        # Map weekday names to numbers (Monday=0, Sunday=6)
-        weekday_mapping = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6,
-            'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3,
-            'fri': 4, 'sat': 5, 'sun': 6
-        }
-        
-        # Enhanced time pattern matching
-        time_pattern = r'(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.?m\.?|p\.?m\.?)?'
-        time_match = re.search(time_pattern, text_lower)
-        
-        # Find weekday mentions
+        # Single scan for weekday mentions, relative terms and clock times
         detected_weekday = None
-        for weekday, weekday_number in weekday_mapping.items():
-            if weekday in text_lower:
-                detected_weekday = weekday_number
+        relative_days = None
+        time_match = None
+        for match in _DATETIME_SCAN_RE.finditer(text_lower, 0, NAIVE_SCAN_MAX_CHARS):
+            kind = match.lastgroup
+            if kind == 'time':
+                time_match = time_match or match
+            elif kind == 'weekday':
+                if detected_weekday is None:
+                    detected_weekday = WEEKDAY_MAPPING[match.group('weekday')]
+            elif relative_days is None:
+                relative_days = RELATIVE_DAY_OFFSETS[match.group('relative')]
+            
+            if detected_weekday is not None and time_match:
                 break
+        
+        if detected_weekday is None and relative_days is None:
+            return None
+        
+        # Read the clock once for whichever branch applies
+        now = datetime.now()
 
         # Process the extracted information
         if detected_weekday is not None:
-            # Calculate target date (next occurrence of the weekday)
-            current_date = datetime.now()
-            current_weekday = current_date.weekday()
-            
-            # Calculate days until target weekday
-            days_ahead = (detected_weekday - current_weekday) % 7
+            # Calculate days until target weekday (next occurrence of the weekday)
+            days_ahead = (detected_weekday - now.weekday()) % 7
             if days_ahead == 0:  # If it's today, schedule for next week
                 days_ahead = 7
                 
-            target_date = current_date + timedelta(days=days_ahead)
+            target_date = now + timedelta(days=days_ahead)
             
             # Process time if available
             if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2) or 0)
-                am_pm = (time_match.group(3) or '').replace('.', '').lower()
-                
-                # Convert 12-hour to 24-hour format
-                if am_pm in ['pm', 'pm']:
-                    if hour != 12:
-                        hour += 12
-                elif am_pm in ['am', 'am']:
-                    if hour == 12:
-                        hour = 0
-                elif hour < 8:  # Assume afternoon if no AM/PM and hour < 8
-                    hour += 12
+                hour, minute = _clock_time(time_match)
                 
                 # Validate hour and minute ranges
                 if 0 <= hour <= 23 and 0 <= minute <= 59:
@@ -485,38 +1203,19 @@ def naive_extract_datetime(text: str) -> Optional[str]:
             
             return target_date.isoformat()
         
-        # If no weekday found, check for relative terms
-        relative_terms = {
-            'tomorrow': 1,
-            'today': 0,
-            'next week': 7
-        }
-        
-        for term, days in relative_terms.items():
-            if term in text_lower:
-                target_date = datetime.now() + timedelta(days=days)
-                if time_match:
-                    # Apply time parsing as above
-                    hour = int(time_match.group(1))
-                    minute = int(time_match.group(2) or 0)
-                    am_pm = (time_match.group(3) or '').replace('.', '').lower()
-                    
-                    if am_pm in ['pm', 'pm'] and hour != 12:
-                        hour += 12
-                    elif am_pm in ['am', 'am'] and hour == 12:
-                        hour = 0
-                    elif hour < 8:
-                        hour += 12
-                    
-                    if 0 <= hour <= 23 and 0 <= minute <= 59:
-                        target_date = target_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                return target_date.isoformat()
-        
-        return None
+        # If no weekday found, fall back to relative terms (the early return
+        # above guarantees one was matched)
+        assert relative_days is not None
+        target_date = now + timedelta(days=relative_days)
+        if time_match:
+            hour, minute = _clock_time(time_match)
+            if 0 <= hour <= 23 and 0 <= minute <= 59:
+                target_date = target_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            
+        return target_date.isoformat()
         
     except Exception as error:
-        print(f"Error in naive datetime extraction: {error}")
+        logger.warning("Error in naive datetime extraction: %s", error)
         return None
 
 # ================================
@@ -524,11 +1223,13 @@ def naive_extract_datetime(text: str) -> Optional[str]:
 # ================================
 
 @app.get('/health')
-def health_check():
+async def health_check():
     """
     Health check endpoint for service monitoring and load balancer probes.
     
     Returns service status, configuration, and availability of key features.
+    Does no I/O, so it runs directly on the event loop rather than being
+    dispatched to the threadpool on every probe.
     """
     return {
         'status': 'ok',
@@ -541,8 +1242,173 @@ def health_check():
         'active_sessions': len(CONVERSATION_HISTORY)
     }
 
+def normalize_chat_request(req: ChatRequest) -> Tuple[str, str, str, str]:
+    """
+    Validate and normalize an incoming chat request.
+    
+    Args:
+        req: ChatRequest containing user message and session information
+        
+    Returns:
+        (stripped message, lowercased message, session_id, user_id)
+        
+    Raises:
+        HTTPException: 400 if the message is empty after stripping
+    """
+    user_message = (req.message or '').strip()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    # Normalized exactly once; helpers below take this as-is (already stripped)
+    return user_message, user_message.lower(), req.session_id or 'anonymous', req.user_id or 'anonymous'
+
+def _reply_fields(
+    reply: Optional[str],
+    appointment_candidate: Optional[str] = None,
+    intent: str = 'chat',
+    needs_confirmation: bool = False,
+    confidence: float = 0.8
+) -> Dict[str, Any]:
+    """Build the reply fields shared by every response, in wire order."""
+    return {
+        'reply': reply,
+        'appointment_candidate': appointment_candidate,
+        'intent': intent,
+        'needs_confirmation': needs_confirmation,
+        'confidence': confidence
+    }
+
+def _chat_response(user_id: str, user_message: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap reply fields in the /simulate response envelope."""
+    return {'user_id': user_id, 'input': user_message, **fields}
+
+async def confirmation_reply(message_lower: str, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a confirm/decline reply to the session's pending proposal.
+    
+    Args:
+        message_lower: Lowercased, stripped user message
+        session_id: Session identifier
+        
+    Returns:
+        Reply fields, or None if the message does not answer a pending proposal
+    """
+    # Cheapest check first. Locally, "is anything pending?" is a dict lookup,
+    # so most messages never get classified; with Redis that check is a
+    # round-trip, so classify (pure CPU) first and only then pop the proposal
+    if get_redis_client() is None and session_id not in LAST_PROPOSAL:
+        return None
+    
+    confirmation_intent = classify_confirmation(message_lower)
+    
+    # Take the pending proposal (if any) only for a confirm/decline reply
+    pending_proposal = await pop_proposal(session_id) if confirmation_intent else None
+    if not pending_proposal:
+        return None
+    
+    # Handle confirmation of previously proposed appointment
+    if confirmation_intent == 'confirm':
+        appointment_time, formatted_time = pending_proposal
+        
+        logger.info("✅ User confirmed appointment: %s", appointment_time)
+        
+        return _reply_fields(
+            f'✅ Perfect! Your appointment is confirmed for {formatted_time}. I look forward to seeing you then!',
+            appointment_time, 'confirm', confidence=1.0
+        )
+    
+    # Handle rejection of previously proposed appointment
+    logger.info("❌ User declined appointment: %s", pending_proposal[0])
+    
+    return _reply_fields(
+        'No problem at all! What day and time would work better for you? I have availability throughout the week.',
+        intent='decline', confidence=1.0
+    )
+
+async def llm_reply(llm_response: Dict[str, Any], session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a standardized LLM response into reply fields, storing any proposal.
+    
+    Args:
+        llm_response: Output of langchain_extract_and_reply() or standardize_llm_response()
+        session_id: Session identifier
+        
+    Returns:
+        Reply fields, or None if the LLM produced nothing usable
+    """
+    # Read each field once and reuse it below
+    reply = llm_response.get("reply")
+    appointment_candidate = llm_response.get("appointment_candidate")
+    
+    if not (reply or appointment_candidate):
+        return None
+    
+    detected_intent = llm_response.get("intent", "chat")
+    llm_confidence = llm_response.get("confidence", 0.8)
+    
+    # Handle appointment proposal from LLM
+    if appointment_candidate and detected_intent == "propose":
+        # Store proposal for confirmation workflow
+        formatted_time = format_appointment_time(appointment_candidate)
+        await set_proposal(session_id, appointment_candidate, formatted_time)
+        
+        logger.info("📅 LLM proposed appointment: %s", appointment_candidate)
+        
+        return _reply_fields(
+            f'{reply} Would you like me to confirm this appointment for {formatted_time}?',
+            appointment_candidate, 'propose', True, llm_confidence
+        )
+    
+    # Regular chat or other intents
+    return _reply_fields(
+        reply, appointment_candidate, detected_intent,
+        llm_response.get('needs_confirmation', False), llm_confidence
+    )
+
+async def naive_reply(user_message: str, message_lower: str, session_id: str) -> Dict[str, Any]:
+    """
+    Build reply fields with the regex parser and keyword fallbacks.
+    
+    Args:
+        user_message: Stripped user message
+        message_lower: Lowercased form of user_message
+        session_id: Session identifier
+        
+    Returns:
+        Reply fields proposing an extracted time, or a general-assistance reply
+    """
+    logger.debug("🔍 Using naive datetime extraction for: '%s'", user_message)
+    
+    # Try to extract appointment time using regex patterns
+    extracted_time = naive_extract_datetime(message_lower)
+    
+    if extracted_time:
+        # Store proposal for confirmation workflow
+        formatted_time = format_appointment_time(extracted_time)
+        await set_proposal(session_id, extracted_time, formatted_time)
+        
+        logger.info("📅 Naive parser extracted time: %s", extracted_time)
+        
+        return _reply_fields(
+            f'Great! I can schedule you for {formatted_time}. Would you like me to confirm this appointment?',
+            extracted_time, 'propose', True,
+            confidence=0.6  # Lower confidence for regex-based extraction
+        )
+    
+    logger.debug("💬 No appointment time detected, providing general assistance")
+    
+    # Provide helpful fallback based on message content
+    return _reply_fields(
+        FALLBACK_REPLIES[classify_fallback_topic(message_lower)],
+        confidence=0.9  # High confidence in fallback responses
+    )
+
+def sse_event(data: Dict[str, Any], event: str) -> bytes:
+    """Format one Server-Sent Events frame carrying a JSON payload (encoded with orjson)."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
 @app.post('/simulate')
-def simulate_chat_interaction(req: ChatRequest) -> Dict[str, Any]:
+async def simulate_chat_interaction(req: ChatRequest) -> Dict[str, Any]:
     """
     Main chat endpoint for processing user messages and generating AI responses.
     
@@ -553,6 +1419,9 @@ def simulate_chat_interaction(req: ChatRequest) -> Dict[str, Any]:
     - Conversation state management
     - Fallback to naive parsing when LLM is unavailable
     
+    Runs on the event loop: the LLM call is awaited so concurrent requests
+    are not bounded by the threadpool, while naive parsing stays inline.
+    
     Args:
         req: ChatRequest containing user message and session information
         
@@ -563,162 +1432,85 @@ def simulate_chat_interaction(req: ChatRequest) -> Dict[str, Any]:
     # Input Processing & Validation
     # ================================
     
-    # Sanitize and prepare input
-    user_message = (req.message or '').strip()
-    if not user_message:
-        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    user_message, message_lower, session_id, user_id = normalize_chat_request(req)
     
-    message_lower = user_message.lower()
-    session_id = req.session_id or 'anonymous'
-    user_id = req.user_id or 'anonymous'
-    
-    print(f"📥 Processing message from {user_id} (Session: {session_id[:8]}): '{user_message[:100]}'")
+    logger.debug("📥 Processing message from %s (Session: %.8s): '%.100s'", user_id, session_id, user_message)
 
     # ================================
     # Appointment Confirmation Workflow
     # ================================
     
-    # Handle confirmation of previously proposed appointment
-    if session_id in LAST_PROPOSAL:
-        has_affirmative = (
-            equals_any_trimmed(message_lower, SHORT_AFFIRMATIVE) or 
-            has_token(message_lower, AFFIRMATIVE_PATTERNS)
-        )
-        
-        if has_affirmative:
-            appointment_time = LAST_PROPOSAL[session_id]
-            # Remove proposal from memory since it's being confirmed
-            del LAST_PROPOSAL[session_id]
-            
-            print(f"✅ User confirmed appointment: {appointment_time}")
-            
-            return {
-                'user_id': user_id,
-                'input': user_message,
-                'reply': f'✅ Perfect! Your appointment is confirmed for {datetime.fromisoformat(appointment_time).strftime("%B %d at %I:%M %p")}. I look forward to seeing you then!',
-                'appointment_candidate': appointment_time,
-                'intent': 'confirm',
-                'needs_confirmation': False,
-                'confidence': 1.0
-            }
-
-        # Handle rejection of previously proposed appointment
-        has_negative = (
-            equals_any_trimmed(message_lower, SHORT_NEGATIVE) or 
-            has_token(message_lower, NEGATIVE_PATTERNS)
-        )
-        
-        if has_negative:
-            # Remove the declined proposal
-            declined_time = LAST_PROPOSAL.pop(session_id, None)
-            print(f"❌ User declined appointment: {declined_time}")
-            
-            return {
-                'user_id': user_id,
-                'input': user_message,
-                'reply': 'No problem at all! What day and time would work better for you? I have availability throughout the week.',
-                'appointment_candidate': None,
-                'intent': 'decline',
-                'needs_confirmation': False,
-                'confidence': 1.0
-            }
+    reply = await confirmation_reply(message_lower, session_id)
 
     # ================================
     # Intelligent Processing Pipeline
     # ================================
     
-    # Log processing mode for debugging
-    llm_available = bool(OPENAI_API_KEY)
-    print(f"🔧 Processing mode - USE_LLM: {USE_LLM}, API Key Available: {llm_available}")
-
     # Primary path: Use LangChain with OpenAI LLM
-    if USE_LLM and llm_available:
-        print(f"🤖 Using advanced AI processing for: '{user_message[:50]}'")
+    if reply is None and _LLM_READY:
+        logger.debug("🤖 Using advanced AI processing for: '%.50s'", user_message)
         
-        llm_response = langchain_extract_and_reply(user_message, session_id)
-        
-        if llm_response.get("reply") or llm_response.get("appointment_candidate"):
-            appointment_candidate = llm_response.get("appointment_candidate")
-            detected_intent = llm_response.get("intent", "chat")
-            
-            # Handle appointment proposal from LLM
-            if appointment_candidate and detected_intent == "propose":
-                # Store proposal for confirmation workflow
-                LAST_PROPOSAL[session_id] = appointment_candidate
-                
-                formatted_time = datetime.fromisoformat(appointment_candidate).strftime("%B %d at %I:%M %p")
-                confirmation_reply = f'{llm_response["reply"]} Would you like me to confirm this appointment for {formatted_time}?'
-                
-                print(f"📅 LLM proposed appointment: {appointment_candidate}")
-                
-                return {
-                    'user_id': user_id,
-                    'input': user_message,
-                    'reply': confirmation_reply,
-                    'appointment_candidate': appointment_candidate,
-                    'intent': 'propose',
-                    'needs_confirmation': True,
-                    'confidence': llm_response.get('confidence', 0.8)
-                }
-            else:
-                # Regular chat or other intents
-                return {
-                    'user_id': user_id,
-                    'input': user_message,
-                    'reply': llm_response['reply'],
-                    'appointment_candidate': appointment_candidate,
-                    'intent': detected_intent,
-                    'needs_confirmation': llm_response.get('needs_confirmation', False),
-                    'confidence': llm_response.get('confidence', 0.8)
-                }
+        reply = await llm_reply(await langchain_extract_and_reply(user_message, session_id), session_id)
 
     # ================================
     # Fallback Processing (Naive Parsing)
     # ================================
     
-    print(f"🔍 Using naive datetime extraction for: '{user_message}'")
+    if reply is None:
+        reply = await naive_reply(user_message, message_lower, session_id)
+
+    return _chat_response(user_id, user_message, reply)
+
+@app.post('/simulate/stream')
+async def stream_chat_interaction(req: ChatRequest) -> StreamingResponse:
+    """
+    Streaming variant of /simulate using Server-Sent Events.
     
-    # Try to extract appointment time using regex patterns
-    extracted_time = naive_extract_datetime(user_message)
+    On the LLM path, 'partial' events carry the reply object as it is being
+    generated so clients can render the first tokens without waiting for the
+    full completion. Every stream ends with one 'result' event whose payload
+    matches the /simulate response; proposals are stored only at that point.
+    If partials were sent but the LLM reply cannot be used (the stream failed
+    or produced nothing usable), an 'error' event precedes the fallback
+    result so clients know to discard the partial text.
     
-    if extracted_time:
-        # Store proposal for confirmation workflow
-        LAST_PROPOSAL[session_id] = extracted_time
+    Args:
+        req: ChatRequest containing user message and session information
         
-        formatted_time = datetime.fromisoformat(extracted_time).strftime("%B %d at %I:%M %p")
+    Returns:
+        text/event-stream response
+    """
+    # Validate before the response starts so bad input still gets a 400
+    user_message, message_lower, session_id, user_id = normalize_chat_request(req)
+    
+    async def event_stream() -> AsyncIterator[bytes]:
+        reply = await confirmation_reply(message_lower, session_id)
         
-        print(f"📅 Naive parser extracted time: {extracted_time}")
+        if reply is None and _LLM_READY:
+            streamed = None  # last partial sent, if any
+            stream_failed = False
+            try:
+                async for streamed in langchain_stream_reply(user_message, session_id):
+                    yield sse_event(streamed, 'partial')
+            except Exception as error:
+                logger.error("❌ LangChain streaming error: %r", error, exc_info=should_log_traceback(error))
+                stream_failed = True
+            
+            if streamed is not None and not stream_failed:
+                standardized = standardize_llm_response(streamed)
+                if standardized is not None:
+                    reply = await llm_reply(standardized, session_id)
+            
+            if reply is None and streamed is not None:
+                # Partials already went out but the result will not be built from them
+                yield sse_event({
+                    'error': 'llm_stream_failed' if stream_failed else 'llm_reply_unusable',
+                    'detail': 'Discard the partial reply; the result below is a fallback response.'
+                }, 'error')
         
-        return {
-            'user_id': user_id,
-            'input': user_message,
-            'reply': f'Great! I can schedule you for {formatted_time}. Would you like me to confirm this appointment?',
-            'appointment_candidate': extracted_time,
-            'intent': 'propose',
-            'needs_confirmation': True,
-            'confidence': 0.6  # Lower confidence for regex-based extraction
-        }
-
-    # ================================
-    # Default Fallback Response
-    # ================================
-    
-    print("💬 No appointment time detected, providing general assistance")
+        if reply is None:
+            reply = await naive_reply(user_message, message_lower, session_id)
+        
+        yield sse_event(_chat_response(user_id, user_message, reply), 'result')
     
-    # Provide helpful fallback based on message content
-    if any(word in message_lower for word in ['appointment', 'schedule', 'book', 'available']):
-        fallback_reply = "I'd be happy to help you schedule an appointment! Please let me know what day and time works best for you. For example, you could say 'next Monday at 2pm' or 'Friday morning'."
-    elif any(word in message_lower for word in ['hours', 'open', 'closed']):
-        fallback_reply = "Our office hours are Monday through Friday 8 AM to 6 PM, and Saturday 9 AM to 3 PM. We're closed on Sundays. When would you like to schedule your appointment?"
-    else:
-        fallback_reply = "Hello! I'm here to help you schedule dental appointments. What day and time would work best for you?"
-
-    return {
-        'user_id': user_id,
-        'input': user_message,
-        'reply': fallback_reply,
-        'appointment_candidate': None,
-        'intent': 'chat',
-        'needs_confirmation': False,
-        'confidence': 0.9  # High confidence in fallback responses
-    }
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
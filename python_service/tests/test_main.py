@@ -1,6 +1,6 @@
 import pytest
 import os
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 from fastapi.testclient import TestClient
 from main import app, get_session_history, langchain_extract_and_reply
 
@@ -14,7 +14,9 @@ def client():
 @pytest.fixture
 def mock_openai_key():
     """Mock OpenAI API key"""
-    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "USE_LLM": "true"}):
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "USE_LLM": "true"}), \
+            patch('main.OPENAI_API_KEY', "test-key"), patch('main.USE_LLM', True), \
+            patch('main._LLM_READY', True):
         yield
 
 
@@ -42,6 +44,21 @@ class TestChatSimulation:
         assert "reply" in data
         assert "intent" in data
 
+    def test_simulate_response_shape(self, client):
+        """Test every response branch returns the same fields"""
+        expected = ["user_id", "input", "reply", "appointment_candidate", "intent", "needs_confirmation", "confidence"]
+        
+        for message in ("Hello", "Friday at 3pm", "yes"):
+            data = client.post("/simulate", json={"message": message, "session_id": "shape_session"}).json()
+            assert list(data) == expected
+
+    def test_simulate_ignores_unknown_fields(self, client):
+        """Test extra request fields are ignored rather than rejected"""
+        payload = {"message": "Hello", "session_id": "test_session", "client_version": "2.1"}
+        response = client.post("/simulate", json=payload)
+        assert response.status_code == 200
+        assert "client_version" not in response.json()
+
     def test_simulate_appointment_request_fallback(self, client):
         """Test appointment request with fallback parser"""
         payload = {
@@ -97,6 +114,56 @@ class TestChatSimulation:
         data = response.json()
         assert data["intent"] == "decline"
 
+    def test_fallback_reply_keywords(self, client):
+        """Test fallback replies are picked by whole-word keywords"""
+        hours = client.post("/simulate", json={"message": "When are you open?"}).json()
+        assert "office hours" in hours["reply"]
+        
+        booking = client.post("/simulate", json={"message": "I'd like a booking"}).json()
+        assert "schedule an appointment" in booking["reply"]
+        
+        # "reopened" must not be read as "open"
+        other = client.post("/simulate", json={"message": "Has the clinic reopened?"}).json()
+        assert other["reply"].startswith("Hello!")
+
+    def test_non_confirmation_skips_proposal_store(self, client):
+        """Test ordinary messages do not touch the proposal store"""
+        payload = {
+            "message": "What are your opening hours?",
+            "user_id": "test_user",
+            "session_id": "test_session"
+        }
+        with patch('main.pop_proposal') as mock_pop:
+            response = client.post("/simulate", json=payload)
+        assert response.status_code == 200
+        mock_pop.assert_not_called()
+
+    def test_no_pending_proposal_skips_classification(self, client):
+        """Test the local store is checked before the reply is classified"""
+        with patch('main.get_redis_client', return_value=None), \
+                patch('main.classify_confirmation') as mock_classify:
+            response = client.post("/simulate", json={"message": "yes", "session_id": "nothing_pending"})
+        assert response.status_code == 200
+        mock_classify.assert_not_called()
+
+    def test_simulate_stream_naive(self, client):
+        """Test the streaming endpoint ends with a result event on the naive path"""
+        import json
+        
+        payload = {"message": "I want an appointment next Monday at 10am", "session_id": "stream_session"}
+        response = client.post("/simulate/stream", json=payload)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        event, data = response.text.strip().split("\n")
+        assert event == "event: result"
+        assert json.loads(data[len("data: "):])["intent"] == "propose"
+
+    def test_simulate_stream_rejects_empty_message(self, client):
+        """Test validation errors are returned before streaming starts"""
+        response = client.post("/simulate/stream", json={"message": "   "})
+        assert response.status_code == 400
+
 
 class TestLangChainIntegration:
     @patch('main.ChatOpenAI')
@@ -112,8 +179,113 @@ class TestLangChainIntegration:
         assert chain is not None
         assert parser is not None
 
+    @patch('main.ChatOpenAI')
+    def test_llm_requests_json_mode(self, mock_llm, mock_openai_key):
+        """Test the LLM is asked for a bare JSON object"""
+        from main import create_langchain_chatbot
+        
+        mock_llm.return_value = Mock()
+        create_langchain_chatbot()
+        assert mock_llm.call_args.kwargs["model_kwargs"] == {"response_format": {"type": "json_object"}}
+
+    def test_format_instructions_from_v2_schema(self):
+        """Test the response schema is a native Pydantic v2 model"""
+        import pydantic
+        from main import FastJsonOutputParser, AppointmentResponse
+        
+        assert issubclass(AppointmentResponse, pydantic.BaseModel)
+        instructions = FastJsonOutputParser(pydantic_object=AppointmentResponse).get_format_instructions()
+        assert '"appointment_candidate"' in instructions
+        assert '"required": ["reply", "intent"]' in instructions
+
+    def test_fast_json_output_parser(self):
+        """Test complete responses are decoded directly and fenced output still parses"""
+        from main import FastJsonOutputParser, AppointmentResponse
+        
+        parser = FastJsonOutputParser(pydantic_object=AppointmentResponse)
+        assert parser.parse('{"reply": "Hi", "intent": "chat"}') == {"reply": "Hi", "intent": "chat"}
+        assert parser.parse('```json\n{"reply": "Hi"}\n```') == {"reply": "Hi"}
+
+    @patch('main.ChatOpenAI')
+    def test_llm_uses_shared_http_client(self, mock_llm, mock_openai_key):
+        """Test OpenAI calls go through one pooled async HTTP client"""
+        from main import create_langchain_chatbot
+        
+        mock_llm.return_value = Mock()
+        http_client = Mock()
+        
+        with patch('main._OPENAI_HTTP_CLIENT', None), \
+                patch('main.create_openai_http_client', return_value=http_client) as mock_create_client:
+            create_langchain_chatbot()
+            create_langchain_chatbot()
+        
+        mock_create_client.assert_called_once_with()
+        assert [call.kwargs["http_async_client"] for call in mock_llm.call_args_list] == [http_client, http_client]
+
+    @patch('main.ChatOpenAI')
+    def test_system_prompt_rendered_once(self, mock_llm, mock_openai_key):
+        """Test the format instructions are baked into a static system message"""
+        from langchain_core.messages import SystemMessage
+        from langchain_core.prompts import ChatPromptTemplate
+        from main import create_langchain_chatbot, SYSTEM_PROMPT
+        
+        mock_llm.return_value = Mock()
+        
+        with patch('main.JsonOutputParser.get_format_instructions', autospec=True,
+                   return_value="FORMAT") as mock_instructions, \
+                patch('main.ChatPromptTemplate.from_messages',
+                      wraps=ChatPromptTemplate.from_messages) as mock_from_messages:
+            create_langchain_chatbot()
+        
+        mock_instructions.assert_called_once()
+        system_message = mock_from_messages.call_args.args[0][0]
+        assert isinstance(system_message, SystemMessage)
+        assert system_message.content == SYSTEM_PROMPT + "FORMAT"
+
+    def test_shutdown_resets_closed_clients(self):
+        """Test shutdown closes shared clients and clears them for the next startup"""
+        import main
+        
+        redis_client, http_client, batcher = AsyncMock(), AsyncMock(), AsyncMock()
+        with patch('main._REDIS', redis_client), patch('main._OPENAI_HTTP_CLIENT', http_client), \
+                patch('main._BATCHER', batcher), patch('main._CHAIN', Mock()), patch('main._PARSER', Mock()):
+            with TestClient(app):
+                pass
+            
+            redis_client.aclose.assert_awaited_once()
+            http_client.aclose.assert_awaited_once()
+            batcher.aclose.assert_awaited_once()
+            assert main._REDIS is None and main._OPENAI_HTTP_CLIENT is None and main._BATCHER is None
+            assert main._CHAIN is None and main._PARSER is None
+
+    @patch('main.create_langchain_chatbot')
+    def test_langchain_chatbot_is_cached(self, mock_create_chatbot, mock_openai_key):
+        """Test LangChain chatbot is built once and reused"""
+        from main import get_langchain_chatbot
+        
+        mock_create_chatbot.return_value = (Mock(), Mock())
+        
+        with patch('main._CHAIN', None), patch('main._PARSER', None):
+            first = get_langchain_chatbot()
+            second = get_langchain_chatbot()
+        
+        assert first == second
+        mock_create_chatbot.assert_called_once()
+
+    @patch('main.create_langchain_chatbot')
+    def test_langchain_chatbot_built_at_startup(self, mock_create_chatbot, mock_openai_key):
+        """Test the LangChain chatbot is built when the app starts"""
+        mock_create_chatbot.return_value = (Mock(), Mock())
+        
+        with patch('main._CHAIN', None), patch('main._PARSER', None):
+            with TestClient(app):
+                mock_create_chatbot.assert_called_once()
+
+    @patch('main._PARSER', None)
+    @patch('main._CHAIN', None)
     @patch('main.create_langchain_chatbot')
-    def test_langchain_extract_and_reply(self, mock_create_chatbot, mock_openai_key):
+    @pytest.mark.asyncio
+    async def test_langchain_extract_and_reply(self, mock_create_chatbot, mock_openai_key):
         """Test LangChain extraction function"""
         # Mock the chain
         mock_chain = Mock()
@@ -121,20 +293,157 @@ class TestLangChainIntegration:
         mock_create_chatbot.return_value = (mock_chain, mock_parser)
         
         # Mock the response
-        mock_chain.invoke.return_value = {
+        mock_chain.ainvoke = AsyncMock(return_value={
             "reply": "I can book you for Monday at 10am",
             "appointment_candidate": "2025-10-07T10:00:00",
             "intent": "propose",
             "needs_confirmation": True,
             "confidence": 0.9
-        }
+        })
         
-        result = langchain_extract_and_reply("book appointment Monday 10am", "test_session")
+        result = await langchain_extract_and_reply("book appointment Monday 10am", "test_session")
         
         assert result["reply"] == "I can book you for Monday at 10am"
         assert result["appointment_candidate"] == "2025-10-07T10:00:00"
         assert result["intent"] == "propose"
 
+    def test_simulate_llm_proposal(self, client, mock_openai_key):
+        """Test an LLM proposal is stored and offered for confirmation"""
+        llm_result = {
+            "reply": "Monday at 10am is open.",
+            "appointment_candidate": "2030-01-07T10:00:00",
+            "intent": "propose",
+            "needs_confirmation": True,
+            "confidence": 0.9
+        }
+        payload = {"message": "Monday at 10 please", "session_id": "llm_session"}
+        
+        with patch('main.langchain_extract_and_reply', AsyncMock(return_value=llm_result)):
+            response = client.post("/simulate", json=payload)
+        
+        data = response.json()
+        assert data["intent"] == "propose"
+        assert data["confidence"] == 0.9
+        assert data["reply"].startswith("Monday at 10am is open. Would you like me to confirm")
+        
+        confirm = client.post("/simulate", json={"message": "yes", "session_id": "llm_session"})
+        assert confirm.json()["appointment_candidate"] == "2030-01-07T10:00:00"
+
+    def test_simulate_stream_llm_partials(self, client, mock_openai_key):
+        """Test LLM partials are streamed and the proposal is stored from the final chunk"""
+        import json
+        
+        async def fake_stream(user_text, session_id):
+            yield {"reply": "Monday"}
+            yield {"reply": "Monday at 10am is open.", "intent": "propose",
+                   "appointment_candidate": "2030-01-07T10:00:00", "confidence": 0.9}
+        
+        with patch('main.langchain_stream_reply', fake_stream):
+            response = client.post("/simulate/stream", json={"message": "Monday at 10", "session_id": "llm_stream"})
+        
+        frames = [frame.split("\n") for frame in response.text.strip().split("\n\n")]
+        assert [event for event, _ in frames] == ["event: partial", "event: partial", "event: result"]
+        result = json.loads(frames[-1][1][len("data: "):])
+        assert result["intent"] == "propose"
+        assert result["needs_confirmation"] is True
+        
+        confirm = client.post("/simulate", json={"message": "yes", "session_id": "llm_stream"})
+        assert confirm.json()["appointment_candidate"] == "2030-01-07T10:00:00"
+
+    def test_simulate_stream_failure_after_partials(self, client, mock_openai_key):
+        """Test a mid-stream failure is signalled before the fallback result"""
+        import json
+        
+        async def failing_stream(user_text, session_id):
+            yield {"reply": "Monday at"}
+            raise RuntimeError("connection reset")
+        
+        with patch('main.langchain_stream_reply', failing_stream):
+            response = client.post("/simulate/stream", json={"message": "Hello", "session_id": "failed_stream"})
+        
+        frames = [frame.split("\n") for frame in response.text.strip().split("\n\n")]
+        assert [event for event, _ in frames] == ["event: partial", "event: error", "event: result"]
+        assert json.loads(frames[1][1][len("data: "):])["error"] == "llm_stream_failed"
+        assert json.loads(frames[2][1][len("data: "):])["intent"] == "chat"
+
+    def test_simulate_stream_non_iso_candidate(self, client, mock_openai_key):
+        """Test an unparseable LLM candidate is signalled before the fallback result"""
+        import json
+        
+        async def fake_stream(user_text, session_id):
+            yield {"reply": "Next Monday"}
+            yield {"reply": "Next Monday at 10am is open.", "intent": "propose",
+                   "appointment_candidate": "next monday 10am", "confidence": 0.9}
+        
+        with patch('main.langchain_stream_reply', fake_stream):
+            response = client.post("/simulate/stream", json={"message": "Hello", "session_id": "non_iso_stream"})
+        
+        frames = [frame.split("\n") for frame in response.text.strip().split("\n\n")]
+        assert [event for event, _ in frames] == ["event: partial", "event: partial", "event: error", "event: result"]
+        assert json.loads(frames[2][1][len("data: "):])["error"] == "llm_reply_unusable"
+        assert json.loads(frames[3][1][len("data: "):])["intent"] == "chat"
+
+
+class TestLLMBatcher:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self):
+        """Test concurrent submissions are dispatched in a single abatch call"""
+        import asyncio
+        from main import LLMBatcher
+        
+        mock_chain = Mock()
+        mock_chain.abatch = AsyncMock(return_value=[{"reply": "a"}, {"reply": "b"}])
+        batcher = LLMBatcher(mock_chain, window_seconds=0.05, max_size=8)
+        
+        try:
+            results = await asyncio.gather(
+                batcher.submit({"input": "first"}, {"configurable": {"session_id": "s1"}}),
+                batcher.submit({"input": "second"}, {"configurable": {"session_id": "s2"}}),
+            )
+        finally:
+            await batcher.aclose()
+        
+        assert results == [{"reply": "a"}, {"reply": "b"}]
+        mock_chain.abatch.assert_awaited_once()
+        inputs = mock_chain.abatch.await_args.args[0]
+        assert inputs == [{"input": "first"}, {"input": "second"}]
+
+    @pytest.mark.asyncio
+    async def test_queued_requests_drained_up_to_max_size(self):
+        """Test already-queued requests are batched without waiting, split at max_size"""
+        import asyncio
+        from main import LLMBatcher
+        
+        mock_chain = Mock()
+        mock_chain.abatch = AsyncMock(side_effect=lambda inputs, **kwargs: [item["input"] for item in inputs])
+        batcher = LLMBatcher(mock_chain, window_seconds=0, max_size=2)
+        
+        try:
+            results = await asyncio.gather(*(
+                batcher.submit({"input": text}, {"configurable": {"session_id": text}})
+                for text in ("a", "b", "c")
+            ))
+        finally:
+            await batcher.aclose()
+        
+        assert results == ["a", "b", "c"]
+        assert [len(call.args[0]) for call in mock_chain.abatch.await_args_list] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_batch_errors_reach_caller(self):
+        """Test a failed item raises in its own caller"""
+        from main import LLMBatcher
+        
+        mock_chain = Mock()
+        mock_chain.abatch = AsyncMock(return_value=[RuntimeError("rate limited")])
+        batcher = LLMBatcher(mock_chain, window_seconds=0, max_size=8)
+        
+        try:
+            with pytest.raises(RuntimeError):
+                await batcher.submit({"input": "hi"}, {"configurable": {"session_id": "s1"}})
+        finally:
+            await batcher.aclose()
+
 
 class TestSessionHistory:
     def test_get_session_history(self):
@@ -147,25 +456,224 @@ class TestSessionHistory:
         history2 = get_session_history(session_id)
         assert history is history2  # Should be same instance
 
+    def test_session_history_is_bounded(self):
+        """Test the session cache is bounded by size and idle time"""
+        from cachetools import TTLCache
+        from main import CONVERSATION_HISTORY, SESSION_CACHE_SIZE, SESSION_TTL_SECONDS
+        
+        assert isinstance(CONVERSATION_HISTORY, TTLCache)
+        assert CONVERSATION_HISTORY.maxsize == SESSION_CACHE_SIZE
+        assert CONVERSATION_HISTORY.ttl == SESSION_TTL_SECONDS
+
+    def test_session_history_evicts_least_recently_used(self):
+        """Test least recently used sessions are evicted once the cache is full"""
+        from cachetools import TTLCache
+        from main import SESSION_TTL_SECONDS
+        
+        with patch('main.CONVERSATION_HISTORY', TTLCache(maxsize=2, ttl=SESSION_TTL_SECONDS)) as cache:
+            for session_id in ("s1", "s2", "s3"):
+                get_session_history(session_id)
+            assert len(cache) == 2
+            assert "s1" not in cache
+
+    @pytest.mark.asyncio
+    async def test_session_history_expires_when_idle(self):
+        """Test idle sessions expire while used ones have their TTL refreshed"""
+        from cachetools import TTLCache
+        from main import SESSION_CACHE_SIZE, SESSION_TTL_SECONDS, load_session_history
+        
+        clock = [0.0]
+        cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL_SECONDS, timer=lambda: clock[0])
+        with patch('main.CONVERSATION_HISTORY', cache), patch('main.get_redis_client', return_value=None):
+            get_session_history("idle_session")
+            active = get_session_history("active_session")
+            
+            clock[0] = SESSION_TTL_SECONDS - 1
+            assert await load_session_history("active_session") is active
+            clock[0] = SESSION_TTL_SECONDS + 1
+            assert "idle_session" not in cache
+            assert "active_session" in cache
+
+    @pytest.mark.asyncio
+    async def test_session_history_rehydrates_from_redis(self):
+        """Test an LRU miss loads the stored history from Redis"""
+        import json
+        from cachetools import LRUCache
+        from langchain_core.messages import HumanMessage, messages_to_dict
+        from main import load_session_history
+        
+        mock_redis = Mock()
+        mock_redis.hget = AsyncMock(return_value=json.dumps(messages_to_dict([HumanMessage(content="hi")])))
+        
+        with patch('main.CONVERSATION_HISTORY', LRUCache(maxsize=10)), \
+                patch('main.get_redis_client', return_value=mock_redis):
+            history = await load_session_history("cold_session")
+            # The sync factory used by the chain now sees the rehydrated history
+            assert get_session_history("cold_session") is history
+        
+        mock_redis.hget.assert_awaited_once_with("session:cold_session", "history")
+        assert [message.content for message in history.messages] == ["hi"]
+
+    @pytest.mark.asyncio
+    async def test_session_history_prefers_redis_over_local_copy(self):
+        """Test turns written by another worker replace a stale local history"""
+        import json
+        from langchain_core.messages import AIMessage, HumanMessage, messages_to_dict
+        from main import load_session_history
+        
+        stale = get_session_history("shared_session")
+        stale.add_user_message("hi")
+        
+        mock_redis = Mock()
+        mock_redis.hget = AsyncMock(return_value=json.dumps(messages_to_dict(
+            [HumanMessage(content="hi"), AIMessage(content="Hello!"), HumanMessage(content="Monday?")]
+        )))
+        
+        with patch('main.get_redis_client', return_value=mock_redis):
+            history = await load_session_history("shared_session")
+            assert get_session_history("shared_session") is history
+        
+        assert [message.content for message in history.messages] == ["hi", "Hello!", "Monday?"]
+
+
+class TestProposalStore:
+    @pytest.mark.asyncio
+    async def test_proposal_round_trip_in_memory(self):
+        """Test proposals are kept locally when Redis is not configured"""
+        from main import set_proposal, pop_proposal
+        
+        proposal = ("2030-01-07T10:00:00", "January 07 at 10:00 AM")
+        with patch('main.get_redis_client', return_value=None):
+            await set_proposal("proposal_session", *proposal)
+            assert await pop_proposal("proposal_session") == proposal
+            assert await pop_proposal("proposal_session") is None
+
+    @pytest.mark.asyncio
+    async def test_unreadable_proposal_treated_as_missing(self):
+        """Test malformed or old-format Redis proposals do not fail the request"""
+        from main import pop_proposal
+        
+        mock_redis = AsyncMock()
+        with patch('main.get_redis_client', return_value=mock_redis):
+            for stored in ("2030-01-07T10:00:00", "{not json", '["soon", "January 07 at 10:00 AM"]', "42"):
+                mock_redis.getdel.return_value = stored
+                assert await pop_proposal("proposal_session") is None
+
+    @pytest.mark.asyncio
+    async def test_proposal_expires_in_memory(self):
+        """Test in-process proposals expire like their Redis counterparts"""
+        from cachetools import TTLCache
+        from main import LAST_PROPOSAL, SESSION_CACHE_SIZE, PROPOSAL_TTL_SECONDS, set_proposal, pop_proposal
+        
+        assert LAST_PROPOSAL.maxsize == SESSION_CACHE_SIZE
+        assert LAST_PROPOSAL.ttl == PROPOSAL_TTL_SECONDS
+        
+        clock = [0.0]
+        cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=PROPOSAL_TTL_SECONDS, timer=lambda: clock[0])
+        with patch('main.LAST_PROPOSAL', cache), patch('main.get_redis_client', return_value=None):
+            await set_proposal("expiring_session", "2030-01-07T10:00:00", "January 07 at 10:00 AM")
+            clock[0] = PROPOSAL_TTL_SECONDS + 1
+            assert await pop_proposal("expiring_session") is None
+
+    @pytest.mark.asyncio
+    async def test_proposal_stored_in_redis_with_ttl(self):
+        """Test proposals are written to Redis with an expiry"""
+        from main import set_proposal, pop_proposal, PROPOSAL_TTL_SECONDS
+        
+        mock_redis = AsyncMock()
+        with patch('main.get_redis_client', return_value=mock_redis):
+            await set_proposal("proposal_session", "2030-01-07T10:00:00", "January 07 at 10:00 AM")
+            
+            key, stored = mock_redis.set.await_args.args
+            assert key == "proposal:proposal_session"
+            assert mock_redis.set.await_args.kwargs == {"ex": PROPOSAL_TTL_SECONDS}
+            
+            mock_redis.getdel.return_value = stored
+            assert await pop_proposal("proposal_session") == ("2030-01-07T10:00:00", "January 07 at 10:00 AM")
+
 
 class TestUtilityFunctions:
-    def test_has_token(self):
-        """Test token matching function"""
-        from main import has_token
-        
-        vocab = {"book", "appointment", "schedule"}
-        assert has_token("I want to book", vocab)
-        assert has_token("schedule meeting", vocab)
-        assert not has_token("I want to look", vocab)
-
-    def test_equals_any_trimmed(self):
-        """Test trimmed equality function"""
-        from main import equals_any_trimmed
-        
-        vals = {"yes", "no", "maybe"}
-        assert equals_any_trimmed(" yes ", vals)
-        assert equals_any_trimmed("no", vals)
-        assert not equals_any_trimmed("okay", vals)
+    def test_naive_extract_datetime_weekday(self):
+        """Test weekday detection uses whole words"""
+        from datetime import datetime
+        from main import naive_extract_datetime
+        
+        result = naive_extract_datetime("can i come in on tues at 2pm?")
+        parsed = datetime.fromisoformat(result)
+        assert parsed.weekday() == 1
+        assert (parsed.hour, parsed.minute) == (14, 0)
+        
+        # "month" must not be read as "mon"
+        assert naive_extract_datetime("sometime this month") is None
+
+    def test_naive_extract_datetime_first_weekday_wins(self):
+        """Test the first weekday mentioned is the one scheduled"""
+        from datetime import datetime
+        from main import naive_extract_datetime
+        
+        parsed = datetime.fromisoformat(naive_extract_datetime("friday or maybe thursday at 3pm"))
+        assert parsed.weekday() == 4
+        assert parsed.hour == 15
+
+    def test_naive_extract_datetime_scan_is_bounded(self):
+        """Test only the leading NAIVE_SCAN_MAX_CHARS characters are scanned"""
+        from main import naive_extract_datetime
+        
+        with patch('main.NAIVE_SCAN_MAX_CHARS', 20):
+            assert naive_extract_datetime("tomorrow at 3pm") is not None
+            assert naive_extract_datetime("x" * 20 + " tomorrow at 3pm") is None
+
+    def test_trie_pattern(self):
+        """Test prefix-factored alternation matches exactly the given words"""
+        import re
+        from main import trie_pattern
+        
+        words = {"mon", "monday", "tue", "tues", "tuesday"}
+        pattern = re.compile(r"\b(?:" + trie_pattern(words) + r")\b")
+        assert trie_pattern({"mon", "monday"}) == "mon(?:day)?"
+        for word in words:
+            assert pattern.fullmatch(word)
+        assert not pattern.search("monda")
+        assert not pattern.search("tuesdays")
+
+    def test_classify_confirmation(self):
+        """Test single-pass confirmation reply classification"""
+        from main import classify_confirmation
+        
+        assert classify_confirmation("y") == "confirm"
+        assert classify_confirmation("n") == "decline"
+        assert classify_confirmation("yes!") == "confirm"
+        assert classify_confirmation("nope.") == "decline"
+        assert classify_confirmation("sounds good, book it") == "confirm"
+        assert classify_confirmation("i don't think that works") == "decline"
+        assert classify_confirmation("what about friday?") is None
+
+    def test_classify_fallback_topic(self):
+        """Test fallback topic detection with scheduling taking precedence"""
+        from main import classify_fallback_topic
+        
+        assert classify_fallback_topic("are you open saturday?") == "office_hours"
+        assert classify_fallback_topic("what are your hours? i want to book") == "scheduling"
+        assert classify_fallback_topic("has the clinic reopened?") is None
+
+    def test_resolve_log_level(self):
+        """Test LOG_LEVEL names resolve case-insensitively with an INFO fallback"""
+        import logging
+        from main import resolve_log_level
+        
+        assert resolve_log_level("warn") == logging.WARNING
+        assert resolve_log_level("DEBUG") == logging.DEBUG
+        assert resolve_log_level("verbose") == logging.INFO
+
+    def test_should_log_traceback_rate_limits_repeats(self):
+        """Test repeated identical errors only log a traceback once"""
+        from cachetools import TTLCache
+        from main import should_log_traceback
+        
+        with patch('main._RECENT_ERRORS', TTLCache(maxsize=16, ttl=60)):
+            assert should_log_traceback(RuntimeError("rate limited"))
+            assert not should_log_traceback(RuntimeError("rate limited"))
+            assert should_log_traceback(ValueError("rate limited"))
 
 
 if __name__ == "__main__":